@@ -18,11 +18,13 @@ depends_on = None
 
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    op.add_column('projects', sa.Column('address', sa.Text(), nullable=True))
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('address', sa.Text(), nullable=True))
     # ### end Alembic commands ###
 
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_column('projects', 'address')
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('address')
     # ### end Alembic commands ###
@@ -111,6 +111,10 @@ class TestConfig(_Config):  # pylint: disable=too-few-public-methods
 
     DEBUG = True
     TESTING = True
+    PROPAGATE_EXCEPTIONS = True
+
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ECHO = False
 
     # POSTGRESQL
     DB_USER = _get_config('DATABASE_TEST_USERNAME', default='postgres')
@@ -122,6 +126,14 @@ class TestConfig(_Config):  # pylint: disable=too-few-public-methods
         'DATABASE_TEST_URL',
         default=f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{int(DB_PORT)}/{DB_NAME}'
     )
+    # Hand the most recently released connection to the next test so it is reused rather than re-opened
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_use_lifo': True,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
 
     JWT_OIDC_TEST_MODE = True
     # JWT_OIDC_ISSUER = _get_config('JWT_OIDC_TEST_ISSUER')
@@ -14,35 +14,122 @@
 
 """Common setup and fixtures for the py-test suite used by this service."""
 
-import asyncio
+import os
 
 import pytest
-from flask_migrate import Migrate, upgrade
-from sqlalchemy import event, text
-from sqlalchemy.schema import DropConstraint, MetaData
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import NullPool
 
 from reports_api import create_app
 from reports_api import jwt as _jwt
+from reports_api.config import TestConfig
 from reports_api.models import Project, Staff
 from reports_api.models import db as _db
 
 
-@pytest.fixture(scope='session', autouse=True)
-def app():
-    """Return a session-wide application configured in TEST mode."""
+_APPS = {}
+
+
+def _get_app(run_mode):
+    """Return the application for the run mode, building it only once per interpreter."""
+    if run_mode not in _APPS:
+        _APPS[run_mode] = create_app(run_mode)
+    return _APPS[run_mode]
+
+
+def _database_url(database):
+    """Return the test database url pointed at the given database name."""
+    url = make_url(TestConfig.SQLALCHEMY_DATABASE_URI)
+    url.database = database
+    return url
+
+
+def _admin_engine():
+    """Return an engine on the maintenance database, outside of any transaction and without pooling."""
+    return create_engine(_database_url('postgres'), isolation_level='AUTOCOMMIT', poolclass=NullPool)
+
+
+def _template_name():
+    """Return the name of the migrated database the xdist workers are cloned from."""
+    return f'{make_url(TestConfig.SQLALCHEMY_DATABASE_URI).database}_template'
+
+
+def pytest_configure(config):
+    """Register the custom markers and migrate the template database once before the xdist workers start."""
+    config.addinivalue_line('markers', 'no_db: the test must not set up the database fixtures')
+
+    if hasattr(config, 'workerinput') or not getattr(config.option, 'numprocesses', None):
+        return
+
+    template = _template_name()
+    with _admin_engine().connect() as connection:
+        quoted = connection.dialect.identifier_preparer.quote(template)
+        if connection.execute(text('SELECT 1 FROM pg_database WHERE datname = :name'), name=template).scalar():
+            connection.execute(text(f'ALTER DATABASE {quoted} WITH IS_TEMPLATE false'))
+            connection.execute(text(f'DROP DATABASE {quoted}'))
+        connection.execute(text(f'CREATE DATABASE {quoted}'))
+
+    from flask_migrate import Migrate, upgrade  # pylint: disable=import-outside-toplevel
+
     _app = create_app('testing')
+    _app.config['SQLALCHEMY_DATABASE_URI'] = str(_database_url(template))
+    with _app.app_context():
+        Migrate(_app, _db)
+        upgrade()
+        # The template cannot be cloned while anything is still connected to it
+        _db.get_engine(_app).dispose()
 
-    return _app
+    with _admin_engine().connect() as connection:
+        quoted = connection.dialect.identifier_preparer.quote(template)
+        connection.execute(text(f'ALTER DATABASE {quoted} WITH ALLOW_CONNECTIONS false IS_TEMPLATE true'))
 
 
-@pytest.fixture(scope='function')
-def app_request():
+def pytest_collection_modifyitems(items):
+    """Fail fast when a test marked no_db pulls in the database fixtures."""
+    for item in items:
+        if item.get_closest_marker('no_db'):
+            db_fixtures = {'db', 'session'}.intersection(getattr(item, 'fixturenames', ()))
+            if db_fixtures:
+                raise pytest.UsageError(f'{item.nodeid} is marked no_db but uses {", ".join(sorted(db_fixtures))}')
+
+
+@pytest.fixture(scope='session')
+def worker_database():
+    """Return this xdist worker's database, cloned from the template, or None when not distributed."""
+    worker = os.getenv('PYTEST_XDIST_WORKER')
+    if not worker:
+        return None
+
+    database = f'{make_url(TestConfig.SQLALCHEMY_DATABASE_URI).database}_{worker}'
+    with _admin_engine().connect() as connection:
+        quote = connection.dialect.identifier_preparer.quote
+        connection.execute(text(f'DROP DATABASE IF EXISTS {quote(database)}'))
+        connection.execute(text(f'CREATE DATABASE {quote(database)} TEMPLATE {quote(_template_name())}'))
+    return database
+
+
+@pytest.fixture(scope='session')
+def app(worker_database):  # pylint: disable=redefined-outer-name
     """Return a session-wide application configured in TEST mode."""
-    _app = create_app('testing')
+    from flask_migrate import Migrate  # pylint: disable=import-outside-toplevel
+
+    _app = _get_app('testing')
+    if worker_database:
+        _app.config['SQLALCHEMY_DATABASE_URI'] = str(_database_url(worker_database))
+    # even though this isn't referenced directly, it sets up the internal configs that upgrade needs
+    Migrate(_app, _db)
 
     return _app
 
 
+@pytest.fixture(scope='function')
+def app_request(app):  # pylint: disable=redefined-outer-name
+    """Return the session-wide application inside a fresh request context."""
+    with app.test_request_context():
+        yield app
+
+
 @pytest.fixture(scope='session')
 def client(app):  # pylint: disable=redefined-outer-name
     """Return a session-wide Flask test client."""
@@ -62,35 +149,41 @@ def client_ctx(app):
         yield _client
 
 
+def _head_revision(flask_app):
+    """Return the latest Alembic revision in the migrations directory."""
+    from alembic.script import ScriptDirectory  # pylint: disable=import-outside-toplevel
+
+    return ScriptDirectory.from_config(flask_app.extensions['migrate'].migrate.get_config()).get_current_head()
+
+
+def _schema_revision():
+    """Return the Alembic revision the test database is stamped with, or None if it was never migrated."""
+    try:
+        return _db.engine.execute(text('SELECT version_num FROM alembic_version')).scalar()
+    except exc.ProgrammingError:
+        # alembic_version does not exist, so nothing has been migrated
+        return None
+
+
+def _reset_schema():
+    """Drop everything in the public schema."""
+    # A single DDL statement clears tables, constraints and sequences alike
+    _db.engine.execute(text('DROP SCHEMA public CASCADE; CREATE SCHEMA public;'))
+
+
 @pytest.fixture(scope='session')
 def db(app):  # pylint: disable=redefined-outer-name, invalid-name
     """Return a session-wide initialised database.
 
-    Drops all existing tables - Meta follows Postgres FKs
+    The existing schema is reused when it is already at the latest revision;
+    set RESET_TEST_DB=1 to drop and rebuild it.
+    Set USE_CREATE_ALL=1 to rebuild the tables from the models instead of replaying the migrations.
+    That schema has none of the lookup data the migrations seed, so tests relying on it will fail,
+    and it is not stamped with an Alembic revision, so the next run without the flag rebuilds it.
     """
-    with app.app_context():
-        # Clear out any existing tables
-        metadata = MetaData(_db.engine)
-        metadata.reflect()
-        for table in metadata.tables.values():
-            for fk in table.foreign_keys:  # pylint: disable=invalid-name
-                _db.engine.execute(DropConstraint(fk.constraint))
-        metadata.drop_all()
-        _db.drop_all()
-
-        sequence_sql = """SELECT sequence_name FROM information_schema.sequences
-                          WHERE sequence_schema='public'
-                       """
-
-        sess = _db.session()
-        for seq in [name for (name,) in sess.execute(text(sequence_sql))]:
-            try:
-                sess.execute(text('DROP SEQUENCE public.%s ;' % seq))
-                print('DROP SEQUENCE public.%s ' % seq)
-            except Exception as err:  # NOQA pylint: disable=broad-except
-                print(f'Error: {err}')
-        sess.commit()
+    from flask_migrate import upgrade  # pylint: disable=import-outside-toplevel
 
+    with app.app_context():
         # ############################################
         # There are 2 approaches, an empty database, or the same one that the app will use
         #     create the tables
@@ -98,17 +191,29 @@ def db(app):  # pylint: disable=redefined-outer-name, invalid-name
         # or
         # Use Alembic to load all of the DB revisions including supporting lookup data
         # This is the path we'll use in legal_api!!
-
-        # even though this isn't referenced directly, it sets up the internal configs that upgrade needs
-        Migrate(app, _db)
+        if os.getenv('USE_CREATE_ALL') == '1':
+            _reset_schema()
+            _db.create_all()
+            return _db
+
+        revision = None if os.getenv('RESET_TEST_DB') == '1' else _schema_revision()
+        if revision == _head_revision(app):
+            return _db
+        if revision is None:
+            # Nothing to upgrade from - an empty database, a requested reset or tables built by create_all
+            _reset_schema()
         upgrade()
 
         return _db
 
 
-@pytest.fixture(scope='function', autouse=True)
-def session(app, db):  # pylint: disable=redefined-outer-name, invalid-name
-    """Return a function-scoped session."""
+@pytest.fixture(scope='session')
+def _db_connection(app, db):  # pylint: disable=redefined-outer-name, invalid-name
+    """Return the session-wide connection that every test session is bound to.
+
+    The app context pushed here stays open for the whole run, so the module and test fixtures
+    don't push their own; popping one would remove the scoped session mid-run.
+    """
     with app.app_context():
         conn = db.engine.connect()
         txn = conn.begin()
@@ -116,24 +221,21 @@ def session(app, db):  # pylint: disable=redefined-outer-name, invalid-name
         options = dict(bind=conn, binds={})
         sess = db.create_scoped_session(options=options)
 
-        # establish  a SAVEPOINT just before beginning the test
-        # (http://docs.sqlalchemy.org/en/latest/orm/session_transaction.html#using-savepoint)
-        sess.begin_nested()
-
-        @event.listens_for(sess(), 'after_transaction_end')
+        # Listen on the factory so every session it builds, including after a remove(), restarts its savepoint
+        @event.listens_for(sess.session_factory, 'after_transaction_end')
         def restart_savepoint(sess2, trans):  # pylint: disable=unused-variable
+            # Only restart while a test is running, so the teardown rollback is final
+            if not sess2.info.get('restart_savepoint'):
+                return
             # Detecting whether this is indeed the nested transaction of the test
             if trans.nested and not trans._parent.nested:  # pylint: disable=protected-access
                 # Handle where test DOESN'T session.commit(),
                 sess2.expire_all()
-                sess.begin_nested()
+                sess2.begin_nested()
 
         db.session = sess
 
-        sql = text('select 1')
-        sess.execute(sql)
-
-        yield sess
+        yield conn
 
         # Cleanup
         sess.remove()
@@ -142,10 +244,43 @@ def session(app, db):  # pylint: disable=redefined-outer-name, invalid-name
         conn.close()
 
 
+@pytest.fixture(scope='module')
+def module_session(db, _db_connection):  # pylint: disable=redefined-outer-name, invalid-name
+    """Return a module-scoped session whose changes are rolled back once the module finishes."""
+    savepoint = _db_connection.begin_nested()
+
+    yield db.session
+
+    # Cleanup
+    db.session.close()
+    # This instruction rollsback any commit that were executed in the module.
+    savepoint.rollback()
+
+
+@pytest.fixture(scope='function')
+def session(_db_connection, module_session):  # pylint: disable=redefined-outer-name, invalid-name
+    """Return a function-scoped session."""
+    # Outer SAVEPOINT for the test; rolling it back keeps the module's baseline rows
+    savepoint = _db_connection.begin_nested()
+
+    # establish  a SAVEPOINT just before beginning the test
+    # (http://docs.sqlalchemy.org/en/latest/orm/session_transaction.html#using-savepoint)
+    module_session.begin_nested()
+    module_session.info['restart_savepoint'] = True
+
+    yield module_session
+
+    # Cleanup
+    module_session.info['restart_savepoint'] = False
+    module_session.rollback()
+    # This instruction rollsback any commit that were executed in the test.
+    savepoint.rollback()
+
+
 @pytest.fixture(scope='function')
 def future(event_loop):
     """Return a future that is used for managing function tests."""
-    _future = asyncio.Future(loop=event_loop)
+    _future = event_loop.create_future()
     return _future
 
 
@@ -170,15 +305,14 @@ def create_mock_coro(mocker, monkeypatch):
 @pytest.fixture(scope='session')
 def docker_compose_files(pytestconfig):
     """Get the docker-compose.yml absolute path."""
-    import os
     return [
         os.path.join(str(pytestconfig.rootdir), 'tests/docker', 'docker-compose.yml')
     ]
 
 
-@pytest.fixture(scope='function')
-def new_project():
-    """Create new project."""
+@pytest.fixture(scope='module')
+def baseline_data(module_session):  # pylint: disable=redefined-outer-name
+    """Create the project and staff shared by the tests in a module with a single commit, returning their ids."""
     project = Project(**{
         "name": "New Project",
         "description": "Testing the create project endpoint",
@@ -188,21 +322,25 @@ def new_project():
         "region_id_env": 1,
         "region_id_flnro": 1
     })
-    project = project.save()
-    return project
-
-
-@pytest.fixture(scope='function')
-def new_staff():
-    """Create new staff."""
     staff = Staff(**{
         "name": "Andrew",
         "phone": "1111111111",
         "email": "andrew@test.com",
         "position_id": 3
     })
-    # staff = staff.save()
-    _db.session.add(staff)
-    _db.session.commit()
+    module_session.add_all([project, staff])
+    module_session.commit()
+
+    return {'project': project.id, 'staff': staff.id}
+
 
-    return staff
+@pytest.fixture(scope='function')
+def new_project(session, baseline_data):  # pylint: disable=redefined-outer-name, unused-argument
+    """Return the baseline project, loaded into the test's session."""
+    return Project.find_by_id(baseline_data['project'])
+
+
+@pytest.fixture(scope='function')
+def new_staff(session, baseline_data):  # pylint: disable=redefined-outer-name, unused-argument
+    """Return the baseline staff, loaded into the test's session."""
+    return Staff.find_by_id(baseline_data['staff'])
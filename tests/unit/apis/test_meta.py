@@ -16,6 +16,10 @@
 from http import HTTPStatus
 from urllib.parse import urljoin
 
+import pytest
+
+
+pytestmark = pytest.mark.no_db
 
 API_BASE_URL = '/api/v1/'
 
@@ -20,7 +20,7 @@ from urllib.parse import urljoin
 API_BASE_URL = '/api/v1/'
 
 
-def test_get_phases(client):
+def test_get_phases(client, session):
     """Test get phases."""
     url = urljoin(API_BASE_URL, 'milestones/phases/11')
     result = client.get(url)
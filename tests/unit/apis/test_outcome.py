@@ -20,14 +20,14 @@ from urllib.parse import urljoin
 API_BASE_URL = '/api/v1/'
 
 
-def test_get_staff_by_position(client):
+def test_get_staff_by_position(client, session):
     """Test get staff by position."""
     url = urljoin(API_BASE_URL, 'outcomes/milestones/3')
     result = client.get(url)
     assert result.status_code == HTTPStatus.OK
 
 
-def test_get_all_active_staff(client):
+def test_get_all_active_staff(client, session):
     """Test get all active staff."""
     url = urljoin(API_BASE_URL, 'staffs')
     result = client.get(url)
@@ -20,7 +20,7 @@ from urllib.parse import urljoin
 API_BASE_URL = '/api/v1/'
 
 
-def test_get_phases(client):
+def test_get_phases(client, session):
     """Test GET phases."""
     url = urljoin(API_BASE_URL, 'phases')
     url = f'{url}/ea_acts/3/work_types/6'
@@ -20,7 +20,7 @@ from urllib.parse import urljoin
 API_BASE_URL = '/api/v1/'
 
 
-def test_create_project(client):
+def test_create_project(client, session):
     """Test create new project."""
     payload = {
         "name": "New Project",
@@ -37,7 +37,7 @@ def test_create_project(client):
     assert 'id' in response.json
 
 
-def test_get_projects(client):
+def test_get_projects(client, session):
     """Test get projects."""
     url = urljoin(API_BASE_URL, 'projects')
     response = client.get(url)
@@ -45,7 +45,7 @@ def test_get_projects(client):
     assert 'projects' in response.json
 
 
-def test_update_project(client):
+def test_update_project(client, session):
     """Test update project."""
     payload = {
         "name": "New Project",
@@ -68,7 +68,7 @@ def test_update_project(client):
     assert response.json['name'] == 'New Project Updated'
 
 
-def test_delete_project(client):
+def test_delete_project(client, session):
     """Test delete project."""
     payload = {
         "name": "New Project",
@@ -91,7 +91,7 @@ def test_delete_project(client):
     assert len(response.json['projects']) == 0
 
 
-def test_project_detail(client):
+def test_project_detail(client, session):
     """Test project details."""
     payload = {
         "name": "New Project",
@@ -20,7 +20,7 @@ from urllib.parse import urljoin
 API_BASE_URL = '/api/v1/'
 
 
-def test_get_subsectors_by_sector_id(client):
+def test_get_subsectors_by_sector_id(client, session):
     """Test get sub sectors by sector_id."""
     url = urljoin(API_BASE_URL, 'sub-sectors?sector_id=1')
     result = client.get(url)
@@ -19,7 +19,7 @@ from http import HTTPStatus
 API_URL = '/api/v1/sync-form-data'
 
 
-def test_sync_form_data_create(client, new_project, new_staff):
+def test_sync_form_data_create(client, session, new_project, new_staff):
     """Test sync form data."""
     payload = {
         "works": {
@@ -42,7 +42,7 @@ def test_sync_form_data_create(client, new_project, new_staff):
     assert result.status_code == HTTPStatus.OK
 
 
-def test_sync_form_data_update(client, new_project, new_staff):
+def test_sync_form_data_update(client, session, new_project, new_staff):
     """Test sync form data update."""
     new_payload = {
         "works": {
@@ -22,6 +22,9 @@ import pytest
 import reports_api.config as config
 
 
+pytestmark = pytest.mark.no_db
+
+
 # testdata pattern is ({str: environment}, {expected return value})
 TEST_ENVIRONMENT_DATA = [
     ('valid', 'development', config.DevConfig),
@@ -16,11 +16,16 @@
 
 Test-Suite to ensure that the version utilities are working as expected.
 """
+import pytest
+
 from reports_api import utils
 from reports_api.version import __version__
 from tests import skip_in_pod
 
 
+pytestmark = pytest.mark.no_db
+
+
 @skip_in_pod
 def test_get_version():
     """Assert thatThe version is returned correctly."""
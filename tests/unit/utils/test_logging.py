@@ -19,9 +19,14 @@ Test-Suite to ensure that the logging setup is working as expected.
 
 import os
 
+import pytest
+
 from reports_api.utils.logging import setup_logging
 
 
+pytestmark = pytest.mark.no_db
+
+
 def test_logging_with_file(capsys):
     """Assert that logging is setup with the configuration file."""
     file_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'logging.conf')
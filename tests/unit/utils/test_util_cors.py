@@ -21,6 +21,9 @@ import pytest
 from reports_api.utils.util import cors_preflight
 
 
+pytestmark = pytest.mark.no_db
+
+
 TEST_CORS_METHODS_DATA = [
     ('GET'),
     ('PUT'),